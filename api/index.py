@@ -1 +1,6 @@
-from worker.main import app
+import os
+from pathlib import Path
+
+from worker.core import create_app
+
+app = create_app(Path(os.getenv("DATA_ROOT", "/tmp/data")))
@@ -27,13 +27,21 @@ http://qdrant:6333. If you wish to override these defaults, supply
 `--opensearch-host` and `--qdrant-host` arguments.
 """
 import argparse
+import concurrent.futures
+import hashlib
+import io
+import itertools
 import json
 import os
 import sys
-import uuid
-from typing import List, Dict, Any
+from typing import Iterable, List, Dict, Any, Optional, Tuple
 
-import numpy as np
+from embedding import encode_cached, encode_sorted, load_encoder, prepare_for_inference
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
 
 try:
     from opensearchpy import OpenSearch, helpers
@@ -42,8 +50,10 @@ except ImportError:
 
 try:
     from qdrant_client import QdrantClient
+    from qdrant_client.http.models import Distance, OptimizersConfigDiff, VectorParams
 except ImportError:
     QdrantClient = None  # type: ignore
+    OptimizersConfigDiff = None  # type: ignore
 
 try:
     from sentence_transformers import SentenceTransformer
@@ -70,93 +80,137 @@ DEFAULT_OPENSEARCH_HOST = "opensearch"
 DEFAULT_OPENSEARCH_PORT = 9200
 DEFAULT_QDRANT_HOST = "qdrant"
 DEFAULT_QDRANT_PORT = 6333
+DEFAULT_QDRANT_GRPC_PORT = 6334
+DEFAULT_EMBEDDING_MODEL = "BAAI/bge-m3"
 
 PARENT_CHUNK_SIZE = 1900
 CHILD_CHUNK_SIZE = 600
 CHILD_CHUNK_OVERLAP = 0.15  # 15%
 
+# On-disk embedding cache (see embedding.encode_cached); disabled if unset
+EMBED_CACHE_DIR = os.environ.get("EMBED_CACHE_DIR")
+
+# Concurrency and request size for Qdrant bulk uploads
+QDRANT_PARALLEL = int(os.environ.get("QDRANT_PARALLEL", 8))
+QDRANT_BATCH = int(os.environ.get("QDRANT_BATCH", 256))
+
+# Qdrant's server-side default, restored after a bulk load when the
+# collection reports no explicit indexing_threshold
+QDRANT_DEFAULT_INDEXING_THRESHOLD = 20000
+
+# Worker threads for OpenSearch parallel bulk indexing
+OS_THREADS = int(os.environ.get("OS_THREADS", 8))
+
 
 def load_elements(path: str) -> List[Dict[str, Any]]:
     """Load elements from a JSON file."""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
-def group_elements_by_doc(elements: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+def group_elements_by_doc(elements: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
     """Group elements by their originating document."""
     grouped: Dict[str, List[Dict[str, Any]]] = {}
     for el in elements:
         doc = el.get('doc', 'unknown')
         grouped.setdefault(doc, []).append(el)
-    # Sort each group's elements by page then by element_id for determinism
+    # Sort each group's elements by page; the sort is stable, so elements
+    # keep their partition order within a page
     for doc, els in grouped.items():
-        els.sort(key=lambda e: (e.get('page', 0), e.get('element_id')))
+        els.sort(key=lambda e: e.get('page', 0))
     return grouped
 
 
-def build_parent_chunks(grouped: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
-    """Assemble parent chunks from grouped elements."""
+def _content_id(*parts: str) -> str:
+    """Deterministic 128-bit hex ID for the given content."""
+    return hashlib.blake2b("\x00".join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def _make_parent(doc: str, position: int, page: int, element_ids: List[Any], text: str) -> Dict[str, Any]:
+    return {
+        # Content-addressed so unchanged chunks keep their ID across runs; the
+        # position within the document keeps repeated identical parents apart
+        'parent_id': _content_id(doc, str(position), str(page), text),
+        'doc': doc,
+        'page': page,
+        'element_ids': element_ids,
+        'text': text
+    }
+
+
+def _parents_for_doc(item: Tuple[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Assemble the parent chunks of a single document."""
+    doc, els = item
     parents: List[Dict[str, Any]] = []
-    for doc, els in grouped.items():
-        buffer: List[str] = []
-        meta_list: List[Dict[str, Any]] = []
-        current_length = 0
-        for el in els:
-            text = el.get('text', '')
-            # If adding this element would exceed the limit, flush current buffer
-            if buffer and current_length + len(text) > PARENT_CHUNK_SIZE:
-                parent_id = str(uuid.uuid4())
-                combined_text = "\n".join(buffer)
-                parents.append({
-                    'parent_id': parent_id,
-                    'doc': doc,
-                    'page': meta_list[0]['page'] if meta_list else 0,
-                    'element_ids': [m['element_id'] for m in meta_list],
-                    'text': combined_text
-                })
-                # Reset buffer
-                buffer = []
-                meta_list = []
-                current_length = 0
-            # Append current element
-            buffer.append(text)
-            meta_list.append({'page': el.get('page', 0), 'element_id': el.get('element_id')})
-            current_length += len(text)
-        # Flush any remaining text as a parent chunk
-        if buffer:
-            parent_id = str(uuid.uuid4())
-            combined_text = "\n".join(buffer)
-            parents.append({
-                'parent_id': parent_id,
-                'doc': doc,
-                'page': meta_list[0]['page'] if meta_list else 0,
-                'element_ids': [m['element_id'] for m in meta_list],
-                'text': combined_text
-            })
+    buf = io.StringIO()
+    element_ids: List[Any] = []
+    first_page = 0
+    current_length = 0
+    for el in els:
+        text = el.get('text', '')
+        text_len = len(text)
+        page = el.get('page', 0)
+        # If adding this element would exceed the limit, flush current buffer
+        if element_ids and current_length + text_len > PARENT_CHUNK_SIZE:
+            parents.append(_make_parent(doc, len(parents), first_page, element_ids, buf.getvalue()))
+            buf = io.StringIO()
+            element_ids = []
+            current_length = 0
+        # Oversized elements are emitted standalone
+        if text_len > PARENT_CHUNK_SIZE:
+            parents.append(_make_parent(doc, len(parents), page, [el.get('element_id')], text))
+            continue
+        # Append current element
+        if element_ids:
+            buf.write("\n")
+        else:
+            first_page = page
+        buf.write(text)
+        element_ids.append(el.get('element_id'))
+        current_length += text_len
+    # Flush any remaining text as a parent chunk
+    if element_ids:
+        parents.append(_make_parent(doc, len(parents), first_page, element_ids, buf.getvalue()))
     return parents
 
 
+def build_parent_chunks(grouped: Dict[str, List[Dict[str, Any]]], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Assemble parent chunks from grouped elements.
+
+    Elements are packed greedily up to PARENT_CHUNK_SIZE characters; an
+    element that is longer than that on its own becomes a separate parent.
+    Documents are independent, so with `workers` > 1 they are processed in
+    a process pool; output order is the same either way. The pool is
+    opt-in: packing is a cheap string join, and pickling elements out and
+    parents back usually costs more than it saves.
+    """
+    if not workers or workers <= 1 or len(grouped) <= 1:
+        return [parent for item in grouped.items() for parent in _parents_for_doc(item)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(itertools.chain.from_iterable(ex.map(_parents_for_doc, grouped.items())))
+
+
 def build_child_chunks(parents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Split parent chunks into smaller child chunks with overlap."""
     children: List[Dict[str, Any]] = []
+    # Determine step size based on overlap
+    step = int(CHILD_CHUNK_SIZE * (1 - CHILD_CHUNK_OVERLAP))
     for parent in parents:
         text = parent['text']
         doc = parent['doc']
         parent_id = parent['parent_id']
-        length = len(text)
-        # Determine step size based on overlap
-        step = int(CHILD_CHUNK_SIZE * (1 - CHILD_CHUNK_OVERLAP))
-        pos = 0
-        while pos < length:
-            chunk_text = text[pos:pos + CHILD_CHUNK_SIZE]
-            child_id = str(uuid.uuid4())
+        for i, start in enumerate(range(0, len(text), step)):
+            chunk_text = text[start:start + CHILD_CHUNK_SIZE]
             children.append({
-                'child_id': child_id,
+                # The window index keeps repeated windows within a parent distinct
+                'child_id': _content_id(parent_id, str(i), chunk_text),
                 'parent_id': parent_id,
                 'doc': doc,
                 'text': chunk_text
             })
-            pos += step
     return children
 
 
@@ -181,24 +235,51 @@ def index_to_opensearch(os_client: "OpenSearch", index_name: str, parents: List[
                 'type': 'parent'
             }
         })
-    if actions:
-        helpers.bulk(os_client, actions)
-
-
-def index_to_qdrant(qd_client: "QdrantClient", collection_name: str, parents: List[Dict[str, Any]], model: "SentenceTransformer") -> None:
-    """Index parent chunks into Qdrant as vector embeddings."""
+    if not actions:
+        return
+    # Disable periodic refresh for the duration of the import
+    os_client.indices.put_settings(index=index_name, body={"index": {"refresh_interval": "-1"}})
+    try:
+        failed = 0
+        for ok, item in helpers.parallel_bulk(
+            os_client,
+            actions,
+            thread_count=OS_THREADS,
+            chunk_size=500,
+            queue_size=8,
+            raise_on_error=False,
+        ):
+            if not ok:
+                failed += 1
+                print(f"Failed to index parent chunk: {item}", file=sys.stderr)
+        if failed:
+            print(f"{failed} of {len(actions)} parent chunks failed to index", file=sys.stderr)
+    finally:
+        os_client.indices.put_settings(index=index_name, body={"index": {"refresh_interval": "1s"}})
+
+
+def index_to_qdrant(qd_client: "QdrantClient", collection_name: str, parents: List[Dict[str, Any]], model: "SentenceTransformer",
+                    model_name: Optional[str] = None, cache_dir: Optional[str] = EMBED_CACHE_DIR) -> None:
+    """Index parent chunks into Qdrant as vector embeddings.
+
+    `model` may be a SentenceTransformer or the ONNX Runtime encoder returned
+    by `load_encoder`. When both `model_name` and `cache_dir` are given, embeddings are looked
+    up in (and added to) the on-disk cache instead of always re-encoding.
+    """
+    model = prepare_for_inference(model)
     # Create collection if it does not exist
     if collection_name not in [c.name for c in qd_client.get_collections().collections]:
         qd_client.create_collection(
             collection_name=collection_name,
-            vectors_config={
-                "size": model.get_sentence_embedding_dimension(),
-                "distance": "Cosine"
-            }
+            # A typed config is required over gRPC, where a plain dict is
+            # read as a map of named vectors
+            vectors_config=VectorParams(
+                size=model.get_sentence_embedding_dimension(),
+                distance=Distance.COSINE,
+            ),
         )
     # Prepare payloads and vectors
     payloads = []
-    vectors = []
     ids = []
     for parent in parents:
         ids.append(parent['parent_id'])
@@ -207,13 +288,72 @@ def index_to_qdrant(qd_client: "QdrantClient", collection_name: str, parents: Li
             'page': parent['page'],
             'parent_id': parent['parent_id']
         })
-        vectors.append(model.encode(parent['text']))
-    if ids:
-        qd_client.upsert(collection_name=collection_name, ids=ids, vectors=vectors, payloads=payloads)
+    texts = [parent['text'] for parent in parents]
+    if model_name and cache_dir:
+        vectors = encode_cached(model, texts, cache_dir, model_name, normalize_embeddings=True)
+    else:
+        vectors = encode_sorted(model, texts, normalize_embeddings=True)
+    if not ids:
+        return
+    # Suspend HNSW indexing during the bulk load and restore the previous
+    # threshold afterwards so the index is built once over all points.
+    threshold = qd_client.get_collection(collection_name).config.optimizer_config.indexing_threshold
+    if threshold is None:
+        # An unset value in the diff is a no-op, which would leave indexing off
+        threshold = QDRANT_DEFAULT_INDEXING_THRESHOLD
+    qd_client.update_collection(
+        collection_name=collection_name,
+        optimizers_config=OptimizersConfigDiff(indexing_threshold=0),
+    )
+    try:
+        qd_client.upload_collection(
+            collection_name=collection_name,
+            vectors=vectors,
+            payload=payloads,
+            ids=ids,
+            parallel=QDRANT_PARALLEL,
+            batch_size=QDRANT_BATCH,
+        )
+    finally:
+        qd_client.update_collection(
+            collection_name=collection_name,
+            optimizers_config=OptimizersConfigDiff(indexing_threshold=threshold),
+        )
+
+
+def make_clients(opensearch_host: str, opensearch_port: int, qdrant_host: str, qdrant_port: int,
+                 qdrant_grpc_port: int = DEFAULT_QDRANT_GRPC_PORT) -> Tuple["OpenSearch", "QdrantClient"]:
+    """Create OpenSearch and Qdrant clients tuned for bulk indexing.
+
+    OpenSearch keeps a pool of keep-alive connections for parallel_bulk and
+    gzips request bodies; Qdrant talks gRPC, which is cheaper than REST/JSON
+    for vector payloads.
+    """
+    if OpenSearch is None or QdrantClient is None:
+        raise RuntimeError("opensearch-py and qdrant-client are required for indexing")
+    os_client = OpenSearch(
+        hosts=[{'host': opensearch_host, 'port': opensearch_port}],
+        http_compress=True,
+        pool_maxsize=32,
+        retry_on_timeout=True,
+        max_retries=3,
+    )
+    qd_client = QdrantClient(
+        host=qdrant_host,
+        port=qdrant_port,
+        grpc_port=qdrant_grpc_port,
+        prefer_grpc=True,
+        grpc_options={'grpc.max_send_message_length': 128 * 1024 * 1024},
+    )
+    return os_client, qd_client
 
 
 def save_child_chunks(children: List[Dict[str, Any]], output_path: str) -> None:
     """Write child chunks to a JSON file."""
+    if orjson is not None:
+        with open(output_path, 'wb') as f_out:
+            f_out.write(orjson.dumps(children, option=orjson.OPT_INDENT_2))
+        return
     with open(output_path, 'w', encoding='utf-8') as f_out:
         json.dump(children, f_out, ensure_ascii=False, indent=2)
 
@@ -228,11 +368,18 @@ def main() -> None:
     parser.add_argument("--opensearch-port", type=int, default=DEFAULT_OPENSEARCH_PORT)
     parser.add_argument("--qdrant-host", default=DEFAULT_QDRANT_HOST)
     parser.add_argument("--qdrant-port", type=int, default=DEFAULT_QDRANT_PORT)
+    parser.add_argument("--qdrant-grpc-port", type=int, default=DEFAULT_QDRANT_GRPC_PORT)
+    parser.add_argument("--index", action="store_true",
+                        help="Also index parent chunks into OpenSearch and Qdrant (off by default)")
+    parser.add_argument("--embedding-model", default=DEFAULT_EMBEDDING_MODEL, help="Embedding model used with --index")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default=os.environ.get("EMBED_BACKEND", "torch"),
+                        help="Run the embedding model with PyTorch or ONNX Runtime")
+    parser.add_argument("--workers", type=int, default=1, help="Processes used to build parent chunks (opt-in)")
     args = parser.parse_args()
 
     elements = load_elements(args.elements)
     grouped = group_elements_by_doc(elements)
-    parent_chunks = build_parent_chunks(grouped)
+    parent_chunks = build_parent_chunks(grouped, workers=args.workers)
     child_chunks = build_child_chunks(parent_chunks)
 
     # NOTE:
@@ -242,10 +389,23 @@ def main() -> None:
     # pipeline relies solely on offline retrieval via regex locators (see
     # retrieve_candidates.py) and therefore does not perform indexing.
 
-    # If opensearch‑py or qdrant‑client packages are available, the indexing
-    # code will be skipped.  This keeps the dependencies light and allows
-    # running the pipeline on GitHub Actions without provisioning remote
-    # services.
+    # Even if opensearch‑py or qdrant‑client packages are available, the
+    # indexing code is skipped unless `--index` is given.  This keeps the
+    # dependencies light and allows running the pipeline on GitHub Actions
+    # without provisioning remote services.
+    if args.index:
+        if args.backend == 'torch' and SentenceTransformer is None:
+            raise RuntimeError("sentence-transformers is required for indexing")
+        os_client, qd_client = make_clients(
+            args.opensearch_host, args.opensearch_port,
+            args.qdrant_host, args.qdrant_port, args.qdrant_grpc_port,
+        )
+        if args.backend == 'onnx':
+            model = load_encoder(args.embedding_model)
+        else:
+            model = SentenceTransformer(args.embedding_model, trust_remote_code=True)
+        index_to_opensearch(os_client, args.opensearch_index, parent_chunks)
+        index_to_qdrant(qd_client, args.qdrant_collection, parent_chunks, model, model_name=args.embedding_model)
 
     # Write child chunks regardless of indexing to feed downstream retrieval.
     save_child_chunks(child_chunks, args.child_output)
@@ -22,6 +22,7 @@ the low threshold, the clause will have an empty list.
 """
 import argparse
 import json
+import os
 import joblib
 from typing import Dict, Any, List
 
@@ -32,6 +33,9 @@ try:
 except ImportError:
     SentenceTransformer = None  # type: ignore
 
+from embedding import (ORTModelForFeatureExtraction, encode_cached, encode_sorted, load_encoder,
+                       prepare_for_inference)
+
 
 def load_chunks(path: str) -> List[Dict[str, Any]]:
     with open(path, 'r', encoding='utf-8') as f:
@@ -45,6 +49,10 @@ def main() -> None:
     parser.add_argument("--threshold-high", type=float, default=0.55, help="High probability threshold")
     parser.add_argument("--threshold-low", type=float, default=0.45, help="Low fallback threshold")
     parser.add_argument("--output", required=True, help="Path to write predictions JSON")
+    parser.add_argument("--embedding-cache", default=os.environ.get("EMBED_CACHE_DIR"),
+                        help="Directory for cached chunk embeddings (disabled if unset)")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default=os.environ.get("EMBED_BACKEND", "torch"),
+                        help="Run the embedding model with PyTorch or ONNX Runtime")
     args = parser.parse_args()
 
     # Load model and label binarizer
@@ -53,12 +61,23 @@ def main() -> None:
     mlb = bundle['mlb']
     # Determine which embedding model to load
     embedding_model_name = bundle.get('embedding_model', 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
-    if SentenceTransformer is None:
-        raise RuntimeError("sentence-transformers is not installed for inference")
-    try:
-        embed_model = SentenceTransformer(embedding_model_name, trust_remote_code=True)
-    except Exception:
-        embed_model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+    if args.backend == 'onnx':
+        if ORTModelForFeatureExtraction is None:
+            raise RuntimeError("optimum[onnxruntime] is not installed for inference")
+        try:
+            embed_model = load_encoder(embedding_model_name)
+        except Exception:
+            embedding_model_name = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+            embed_model = load_encoder(embedding_model_name)
+    else:
+        if SentenceTransformer is None:
+            raise RuntimeError("sentence-transformers is not installed for inference")
+        try:
+            embed_model = SentenceTransformer(embedding_model_name, trust_remote_code=True)
+        except Exception:
+            embedding_model_name = 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+            embed_model = SentenceTransformer(embedding_model_name)
+        embed_model = prepare_for_inference(embed_model)
 
     # Load child chunks
     chunks = load_chunks(args.child_chunks)
@@ -66,32 +85,32 @@ def main() -> None:
     child_ids = [chunk['child_id'] for chunk in chunks]
 
     # Compute embeddings
-    X = np.array(embed_model.encode(texts))
-    # Predict probabilities
-    probs = clf.predict_proba(X)
-    # Convert to dictionary keyed by clause
+    if args.embedding_cache:
+        X = encode_cached(embed_model, texts, args.embedding_cache, embedding_model_name)
+    else:
+        X = encode_sorted(embed_model, texts)
+    # Predict probabilities, shape (n_chunks, n_clauses)
+    probs = np.asarray(clf.predict_proba(X))
     clause_names = mlb.classes_.tolist()
-    predictions: Dict[str, List[Dict[str, Any]]] = {name: [] for name in clause_names}
 
-    # Fill predictions
-    for idx, prob_vec in enumerate(probs):
-        for clause_idx, clause_name in enumerate(clause_names):
-            prob = prob_vec[clause_idx]
-            predictions[clause_name].append({
+    # Select chunks per clause using thresholds, falling back to the low
+    # threshold when nothing clears the high one.
+    final: Dict[str, List[Dict[str, Any]]] = {}
+    for clause_idx, clause_name in enumerate(clause_names):
+        col = probs[:, clause_idx]
+        selected = np.flatnonzero(col >= args.threshold_high)
+        if selected.size == 0:
+            selected = np.flatnonzero(col >= args.threshold_low)
+        # Sort descending by probability (stable, so ties keep chunk order)
+        ordered = selected[np.argsort(-col[selected], kind='stable')]
+        final[clause_name] = [
+            {
                 'child_id': child_ids[idx],
                 'text': texts[idx],
-                'probability': float(prob)
-            })
-    # Filter predictions per clause using thresholds
-    final: Dict[str, List[Dict[str, Any]]] = {}
-    for clause, preds in predictions.items():
-        # Sort descending by probability
-        preds.sort(key=lambda x: x['probability'], reverse=True)
-        # Try high threshold
-        selected = [p for p in preds if p['probability'] >= args.threshold_high]
-        if not selected:
-            selected = [p for p in preds if p['probability'] >= args.threshold_low]
-        final[clause] = selected
+                'probability': float(col[idx])
+            }
+            for idx in ordered
+        ]
 
     # Write out
     with open(args.output, 'w', encoding='utf-8') as f_out:
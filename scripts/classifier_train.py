@@ -29,6 +29,8 @@ try:
 except ImportError:
     SentenceTransformer = None  # type: ignore
 
+from embedding import encode_sorted, prepare_for_inference
+
 from sklearn.preprocessing import MultiLabelBinarizer
 from sklearn.linear_model import LogisticRegression
 from sklearn.multiclass import OneVsRestClassifier
@@ -41,7 +43,7 @@ def load_training_data(path: str) -> List[Dict[str, Any]]:
 
 
 def compute_embeddings(texts: List[str], model: "SentenceTransformer") -> np.ndarray:
-    return np.array(model.encode(texts))
+    return encode_sorted(model, texts)
 
 
 def main() -> None:
@@ -57,8 +59,8 @@ def main() -> None:
     texts = [entry['text'] for entry in data]
     labels = [entry['labels'] for entry in data]
 
-    # Fit label binarizer
-    mlb = MultiLabelBinarizer()
+    # Fit label binarizer; y is a CSR matrix since most labels are absent
+    mlb = MultiLabelBinarizer(sparse_output=True)
     y = mlb.fit_transform(labels)
 
     # Load embedding model
@@ -66,14 +68,17 @@ def main() -> None:
         model = SentenceTransformer('BAAI/bge-m3', trust_remote_code=True)
     except Exception:
         model = SentenceTransformer('sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+    model = prepare_for_inference(model)
 
     X = compute_embeddings(texts, model)
 
-    # Train one-vs-rest logistic regression and calibrate probabilities
-    base_clf = LogisticRegression(max_iter=1000, class_weight='balanced')
-    ovr = OneVsRestClassifier(base_clf)
+    # Train one-vs-rest logistic regression and calibrate probabilities.
+    # liblinear suits the small binary subproblems; clauses and calibration
+    # folds are fitted in parallel.
+    base_clf = LogisticRegression(max_iter=1000, class_weight='balanced', solver='liblinear')
+    ovr = OneVsRestClassifier(base_clf, n_jobs=-1)
     # Calibrate each classifier
-    calibrated = CalibratedClassifierCV(ovr, method='sigmoid', cv=3)
+    calibrated = CalibratedClassifierCV(ovr, method='sigmoid', cv=3, n_jobs=-1)
     calibrated.fit(X, y)
 
     # Save model and label binarizer
@@ -23,93 +23,209 @@ import argparse
 import json
 import os
 import re
-from typing import Dict, Any
+import unicodedata
+import zipfile
+from typing import Callable, Dict, Any, List, Optional, Set
 
 try:
-    from docx import Document
+    from lxml import etree
 except ImportError:
-    Document = None  # type: ignore
+    etree = None  # type: ignore
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None  # type: ignore
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None  # type: ignore
 
 # Regular expressions for extracting numeric values and key phrases
 RE_NUMBER = re.compile(r"\d+[\d,]*\.?\d*")
 RE_INCOTERM = re.compile(r"\b(DDP|EXW|FCA|FOB|CFR|CIF|CPT|CIP|DAP|DPU|DDU)\b", re.IGNORECASE)
 RE_FX_RATE = re.compile(r"fxmarketrate", re.IGNORECASE)
 
+# Persian and Arabic-Indic digits mapped to ASCII
+DIGIT_MAP = str.maketrans("۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩", "01234567890123456789")
+
+# WordprocessingML namespace used when reading document.xml directly
+W_NS = {"w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"}
+
+# Literal phrases looked for by the individual checks
+WARRANTY_PHRASE = "۱۲ ماه پس از نصب"
+HIDDEN_DEFECTS_PHRASE = "۶۰ روز پس از تحویل"
+ACCESSORY_KEYWORDS = ["پایه", "کابل", "لوله", "درین"]
+IP_KEYWORDS = ["مالکیت فکری", "مالکیت معنوی", "IP"]
+TERMINATION_KEYWORDS = ["فسخ", "تهاتر", "۱۵", "پانزده"]
+# 0.25% per day in digits or words
+LD_PHRASES = ["0.25", "بیست و پنج صدم"]
+PARTIAL_SHIPMENT_PHRASE = "ارسال جزئی"
+PARTIAL_APPROVAL_KEYWORDS = ["تأیید", "اجازه"]
+DELIVERY_ANCHOR_KEYWORDS = ["تاریخ اثر", "تاریخ پرداخت پیش پرداخت", "روز به روز"]
+QC_DOC_KEYWORDS = ["Packing List", "MTC", "CoC", "Final Book"]
+PG_KEYWORDS = ["۱۰", "ده", "BG", "ضمانت"]
+APG_KEYWORDS = ["۱۰۰", "صد", "120", "cheque", "چک"]
+
+
+def normalize_for_matching(text: str) -> str:
+    """Canonicalise text for matching: NFC and ASCII digits. Case is kept."""
+    return unicodedata.normalize("NFC", text).translate(DIGIT_MAP)
+
+
+# Canonical (normalised) keyword -> the keyword constants it stands for. The
+# scanner matches canonical forms; hits are reported as the original
+# constants so each check can test membership with its own keyword lists.
+KEYWORD_VARIANTS: Dict[str, List[str]] = {}
+for _kw in {
+    WARRANTY_PHRASE, HIDDEN_DEFECTS_PHRASE, PARTIAL_SHIPMENT_PHRASE,
+    *ACCESSORY_KEYWORDS, *IP_KEYWORDS, *TERMINATION_KEYWORDS, *LD_PHRASES,
+    *PARTIAL_APPROVAL_KEYWORDS, *DELIVERY_ANCHOR_KEYWORDS, *QC_DOC_KEYWORDS,
+    *PG_KEYWORDS, *APG_KEYWORDS,
+}:
+    KEYWORD_VARIANTS.setdefault(normalize_for_matching(_kw), []).append(_kw)
+
+ALL_KEYWORDS = sorted(KEYWORD_VARIANTS)
+
+
+def _build_keyword_scanner() -> Callable[[str], Set[str]]:
+    """Build a single-pass multi-keyword scanner over ALL_KEYWORDS.
+
+    Keywords are case-sensitive substrings, as in the original checks. The
+    returned function expects normalised text and yields the original
+    keyword constants found in it. Uses Hyperscan when installed, then
+    pyahocorasick, and finally plain substring tests so the checks work
+    without either extension.
+    """
+    if hyperscan is not None:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[re.escape(kw).encode('utf-8') for kw in ALL_KEYWORDS],
+            ids=list(range(len(ALL_KEYWORDS))),
+            flags=[hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_SINGLEMATCH] * len(ALL_KEYWORDS),
+        )
+
+        def scan(text: str) -> Set[str]:
+            hits: Set[str] = set()
+
+            def on_match(pattern_id, start, end, flags, context):
+                hits.add(ALL_KEYWORDS[pattern_id])
+
+            db.scan(text.encode('utf-8'), match_event_handler=on_match)
+            return _expand(hits)
+        return scan
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for kw in ALL_KEYWORDS:
+            automaton.add_word(kw, kw)
+        automaton.make_automaton()
+        return lambda text: _expand({kw for _, kw in automaton.iter(text)})
+
+    return lambda text: _expand({kw for kw in ALL_KEYWORDS if kw in text})
+
+
+def _expand(canonical_hits: Set[str]) -> Set[str]:
+    return {kw for hit in canonical_hits for kw in KEYWORD_VARIANTS[hit]}
+
+
+scan_keywords = _build_keyword_scanner()
+
 
 def extract_text_from_docx(path: str) -> str:
-    """Extract all text from a DOCX file by concatenating paragraphs and table cells."""
-    if Document is None:
-        raise RuntimeError("python-docx is not installed")
-    doc = Document(path)
-    texts = []
-    for paragraph in doc.paragraphs:
-        texts.append(paragraph.text)
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                texts.append(cell.text)
-    return "\n".join(texts)
-
-
-def check_warranty(text: str) -> Dict[str, Any]:
-    expected = "۱۲ ماه پس از نصب"
-    status = "PASS" if expected in text else "FAIL"
-    return {"expected": expected, "found": expected in text, "status": status}
-
-
-def check_hidden_defects(text: str) -> Dict[str, Any]:
-    expected = "۶۰ روز پس از تحویل"
-    status = "PASS" if expected in text else "FAIL"
-    return {"expected": expected, "found": expected in text, "status": status}
-
-
-def check_accessories(text: str) -> Dict[str, Any]:
-    keywords = ["پایه", "کابل", "لوله", "درین"]
-    found_keywords = [kw for kw in keywords if kw in text]
+    """Extract all text from a DOCX file, one line per paragraph (including table cells).
+
+    Reads `word/document.xml` straight from the archive rather than building
+    python-docx's object model, which is much faster on large documents.
+    """
+    if etree is None:
+        raise RuntimeError("lxml is not installed")
+    with zipfile.ZipFile(path) as archive:
+        with archive.open('word/document.xml') as xml_file:
+            tree = etree.parse(xml_file)
+    # Runs within a paragraph are concatenated so phrases split across
+    # formatting runs still match.
+    return "\n".join(
+        "".join(paragraph.xpath('.//w:t/text()', namespaces=W_NS))
+        for paragraph in tree.xpath('//w:body//w:p', namespaces=W_NS)
+    )
+
+
+# Keyword checks accept the precomputed `hits` from scan_keywords so
+# perform_checks normalises and scans the document once; standalone calls
+# normalise and scan the raw text on demand.
+
+def check_warranty(text: str, hits: Optional[Set[str]] = None) -> Dict[str, Any]:
+    hits = scan_keywords(normalize_for_matching(text)) if hits is None else hits
+    expected = WARRANTY_PHRASE
+    found = expected in hits
+    status = "PASS" if found else "FAIL"
+    return {"expected": expected, "found": found, "status": status}
+
+
+def check_hidden_defects(text: str, hits: Optional[Set[str]] = None) -> Dict[str, Any]:
+    hits = scan_keywords(normalize_for_matching(text)) if hits is None else hits
+    expected = HIDDEN_DEFECTS_PHRASE
+    found = expected in hits
+    status = "PASS" if found else "FAIL"
+    return {"expected": expected, "found": found, "status": status}
+
+
+def check_accessories(text: str, hits: Optional[Set[str]] = None) -> Dict[str, Any]:
+    hits = scan_keywords(normalize_for_matching(text)) if hits is None else hits
+    keywords = ACCESSORY_KEYWORDS
+    found_keywords = [kw for kw in keywords if kw in hits]
     status = "PASS" if found_keywords else "UNCERTAIN"
     return {"expected_keywords": keywords, "found_keywords": found_keywords, "status": status}
 
 
-def check_ip_indemnity(text: str) -> Dict[str, Any]:
-    keywords = ["مالکیت فکری", "مالکیت معنوی", "IP"]
-    found = any(kw in text for kw in keywords)
+def check_ip_indemnity(text: str, hits: Optional[Set[str]] = None) -> Dict[str, Any]:
+    hits = scan_keywords(normalize_for_matching(text)) if hits is None else hits
+    keywords = IP_KEYWORDS
+    found = any(kw in hits for kw in keywords)
     status = "PASS" if found else "UNCERTAIN"
     return {"keywords": keywords, "found": found, "status": status}
 
 
-def check_termination_setoff(text: str) -> Dict[str, Any]:
-    keywords = ["فسخ", "تهاتر", "۱۵", "پانزده"]
-    found = all(kw in text for kw in keywords)
+def check_termination_setoff(text: str, hits: Optional[Set[str]] = None) -> Dict[str, Any]:
+    hits = scan_keywords(normalize_for_matching(text)) if hits is None else hits
+    keywords = TERMINATION_KEYWORDS
+    found = all(kw in hits for kw in keywords)
     status = "PASS" if found else "UNCERTAIN"
     return {"keywords": keywords, "found": found, "status": status}
 
 
-def check_ld(text: str) -> Dict[str, Any]:
+def check_ld(text: str, hits: Optional[Set[str]] = None) -> Dict[str, Any]:
     # Check for presence of 0.25% per day phrase in Persian or numeric form
-    patterns = [r"۰\.۲۵", r"0\.25", r"بیست و پنج صدم"]
-    found = any(re.search(pattern, text) for pattern in patterns)
+    hits = scan_keywords(normalize_for_matching(text)) if hits is None else hits
+    patterns = LD_PHRASES
+    found = any(p in hits for p in patterns)
     status = "PASS" if found else "FAIL"
     return {"patterns": patterns, "found": found, "status": status}
 
 
-def check_partial_shipments(text: str) -> Dict[str, Any]:
+def check_partial_shipments(text: str, hits: Optional[Set[str]] = None) -> Dict[str, Any]:
     # Only pass if phrase 'ارسال جزئی' appears along with 'تأیید' or 'اجازه'
-    found = "ارسال جزئی" in text and ("تأیید" in text or "اجازه" in text)
+    hits = scan_keywords(normalize_for_matching(text)) if hits is None else hits
+    found = PARTIAL_SHIPMENT_PHRASE in hits and any(kw in hits for kw in PARTIAL_APPROVAL_KEYWORDS)
     status = "PASS" if found else "UNCERTAIN"
-    return {"phrase": "ارسال جزئی", "found": found, "status": status}
+    return {"phrase": PARTIAL_SHIPMENT_PHRASE, "found": found, "status": status}
 
 
-def check_delivery_anchor(text: str) -> Dict[str, Any]:
+def check_delivery_anchor(text: str, hits: Optional[Set[str]] = None) -> Dict[str, Any]:
     # We check for mentions of earliest of contract effective date or prepayment and day-for-day extension
-    anchor_keywords = ["تاریخ اثر", "تاریخ پرداخت پیش پرداخت", "روز به روز"]
-    found = all(kw in text for kw in anchor_keywords)
+    hits = scan_keywords(normalize_for_matching(text)) if hits is None else hits
+    anchor_keywords = DELIVERY_ANCHOR_KEYWORDS
+    found = all(kw in hits for kw in anchor_keywords)
     status = "PASS" if found else "UNCERTAIN"
     return {"keywords": anchor_keywords, "found": found, "status": status}
 
 
-def check_qc_docs(text: str) -> Dict[str, Any]:
-    docs_keywords = ["Packing List", "MTC", "CoC", "Final Book"]
-    found = all(kw in text for kw in docs_keywords)
+def check_qc_docs(text: str, hits: Optional[Set[str]] = None) -> Dict[str, Any]:
+    hits = scan_keywords(normalize_for_matching(text)) if hits is None else hits
+    docs_keywords = QC_DOC_KEYWORDS
+    found = all(kw in hits for kw in docs_keywords)
     status = "PASS" if found else "UNCERTAIN"
     return {"keywords": docs_keywords, "found": found, "status": status}
 
@@ -122,17 +238,18 @@ def check_fx_rate(text: str) -> Dict[str, Any]:
 
 def check_incoterm(text: str) -> Dict[str, Any]:
     match = RE_INCOTERM.search(text)
-    incoterm = match.group(1) if match else None
+    incoterm = match.group(1).upper() if match else None
     status = "PASS" if incoterm else "FAIL"
     return {"incoterm": incoterm, "status": status}
 
 
-def check_pg_apg(text: str) -> Dict[str, Any]:
+def check_pg_apg(text: str, hits: Optional[Set[str]] = None) -> Dict[str, Any]:
     # Check presence of guarantee phrases. Simplified: look for 'ضمانت' or 'چک'
-    pg_keywords = ["۱۰", "ده", "BG", "ضمانت"]
-    apg_keywords = ["۱۰۰", "صد", "120", "۱۲۰", "cheque", "چک"]
-    found_pg = any(kw in text for kw in pg_keywords)
-    found_apg = any(kw in text for kw in apg_keywords)
+    hits = scan_keywords(normalize_for_matching(text)) if hits is None else hits
+    pg_keywords = PG_KEYWORDS
+    apg_keywords = APG_KEYWORDS
+    found_pg = any(kw in hits for kw in pg_keywords)
+    found_apg = any(kw in hits for kw in apg_keywords)
     status_pg = "PASS" if found_pg else "UNCERTAIN"
     status_apg = "PASS" if found_apg else "UNCERTAIN"
     return {
@@ -146,20 +263,22 @@ def check_pg_apg(text: str) -> Dict[str, Any]:
 
 
 def perform_checks(po_path: str) -> Dict[str, Any]:
-    text = extract_text_from_docx(po_path)
+    text = normalize_for_matching(extract_text_from_docx(po_path))
+    # Scan for every keyword in a single pass and share the hits
+    hits = scan_keywords(text)
     results: Dict[str, Any] = {}
-    results['warranty'] = check_warranty(text)
-    results['hidden_defects'] = check_hidden_defects(text)
-    results['accessories'] = check_accessories(text)
-    results['ip_indemnity'] = check_ip_indemnity(text)
-    results['termination_setoff'] = check_termination_setoff(text)
-    results['ld'] = check_ld(text)
-    results['partial_shipments'] = check_partial_shipments(text)
-    results['delivery_anchor'] = check_delivery_anchor(text)
-    results['qc_docs'] = check_qc_docs(text)
+    results['warranty'] = check_warranty(text, hits)
+    results['hidden_defects'] = check_hidden_defects(text, hits)
+    results['accessories'] = check_accessories(text, hits)
+    results['ip_indemnity'] = check_ip_indemnity(text, hits)
+    results['termination_setoff'] = check_termination_setoff(text, hits)
+    results['ld'] = check_ld(text, hits)
+    results['partial_shipments'] = check_partial_shipments(text, hits)
+    results['delivery_anchor'] = check_delivery_anchor(text, hits)
+    results['qc_docs'] = check_qc_docs(text, hits)
     results['fx_rate'] = check_fx_rate(text)
     results['incoterm'] = check_incoterm(text)
-    results['pg_apg'] = check_pg_apg(text)
+    results['pg_apg'] = check_pg_apg(text, hits)
     return results
 
 
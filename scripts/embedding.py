@@ -0,0 +1,208 @@
+"""
+embedding.py
+
+Embedding helpers shared by chunk_and_index.py, classifier_train.py and
+classifier_infer.py: loading an ONNX Runtime encoder, preparing a PyTorch
+model for inference, length-sorted batch encoding and the on-disk embedding
+cache. The scripts are run as `python scripts/<name>.py`, which puts this
+directory on sys.path, so they import it as a plain module.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import torch
+except ImportError:
+    torch = None  # type: ignore
+
+try:
+    from huggingface_hub import hf_hub_download
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+except ImportError:
+    ORTModelForFeatureExtraction = None  # type: ignore
+
+# Number of texts per forward pass
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", 64))
+
+# Version prefix for the embedding cache layout; bump to invalidate old entries
+EMBED_CACHE_VERSION = "v2"
+
+# Where exported ONNX models are kept between runs (see load_encoder)
+ONNX_CACHE_DIR = os.environ.get("ONNX_CACHE_DIR", "cache/onnx")
+
+# Pooling/normalisation settings saved next to each ONNX export
+ENCODER_CONFIG_FILE = "encoder_config.json"
+
+
+class OnnxEncoder:
+    """SentenceTransformer-compatible encoder backed by ONNX Runtime.
+
+    Reproduces the pooling and normalisation configured for the model in
+    its sentence-transformers config files, so vectors match the PyTorch
+    path closely enough to share a classifier or collection.
+    """
+
+    def __init__(self, model: Any, tokenizer: Any, pooling: str = 'mean', normalize: bool = False,
+                 max_length: int = 512) -> None:
+        self.model = model
+        self.tokenizer = tokenizer
+        self.pooling = pooling
+        self.normalize = normalize
+        self.max_length = max_length
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.config.hidden_size
+
+    def encode(self, texts: List[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                    max_length=self.max_length, return_tensors='np')
+            hidden = np.asarray(self.model(**inputs).last_hidden_state, dtype=np.float32)
+            if self.pooling == 'cls':
+                emb = hidden[:, 0]
+            else:
+                mask = inputs['attention_mask'][..., None].astype(np.float32)
+                emb = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize or normalize_embeddings:
+                emb = emb / np.clip(np.linalg.norm(emb, axis=1, keepdims=True), 1e-12, None)
+            batches.append(emb)
+        if not batches:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.vstack(batches)
+
+
+def _read_model_file(name: str, filename: str) -> Dict[str, Any]:
+    """Read a JSON config file from a local model directory or the HF hub."""
+    try:
+        if os.path.isdir(name):
+            path = os.path.join(name, filename)
+        else:
+            path = hf_hub_download(name, filename)
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as exc:
+        raise RuntimeError(f"Cannot read {filename} for {name}: {exc}") from exc
+
+
+def _encoder_config(name: str) -> Dict[str, Any]:
+    """Derive pooling, normalisation and max length from the model's sentence-transformers config."""
+    pooling_config = _read_model_file(name, '1_Pooling/config.json')
+    if pooling_config.get('pooling_mode_cls_token'):
+        pooling = 'cls'
+    elif pooling_config.get('pooling_mode_mean_tokens'):
+        pooling = 'mean'
+    else:
+        raise RuntimeError(f"Unsupported pooling mode for {name}: {pooling_config}")
+    modules = _read_model_file(name, 'modules.json')
+    st_config = _read_model_file(name, 'sentence_bert_config.json')
+    return {
+        'pooling': pooling,
+        'normalize': any(m.get('type', '').endswith('Normalize') for m in modules),
+        'max_length': st_config.get('max_seq_length', 512),
+    }
+
+
+def load_encoder(name: str, cache_dir: str = ONNX_CACHE_DIR) -> OnnxEncoder:
+    """Load `name` as an ONNX Runtime encoder, exporting it on first use.
+
+    The pooling and normalisation settings are read from the model once, at
+    export time, and stored in the export directory; later loads use only
+    that directory and fail if the settings file is missing.
+    """
+    if ORTModelForFeatureExtraction is None:
+        raise RuntimeError("optimum[onnxruntime] is not installed")
+    export_dir = os.path.join(cache_dir, name.replace('/', '_'))
+    config_path = os.path.join(export_dir, ENCODER_CONFIG_FILE)
+    if os.path.isdir(export_dir):
+        if not os.path.isfile(config_path):
+            raise RuntimeError(f"{config_path} is missing; delete {export_dir} to re-export {name}")
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        model = ORTModelForFeatureExtraction.from_pretrained(export_dir)
+        tokenizer = AutoTokenizer.from_pretrained(export_dir)
+    else:
+        config = _encoder_config(name)
+        model = ORTModelForFeatureExtraction.from_pretrained(name, export=True)
+        tokenizer = AutoTokenizer.from_pretrained(name)
+        model.save_pretrained(export_dir)
+        tokenizer.save_pretrained(export_dir)
+        # Written last, so an interrupted export is detected on the next load
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(config, f, indent=2)
+    return OnnxEncoder(model, tokenizer, **config)
+
+
+def prepare_for_inference(model: Any) -> Any:
+    """Run the model in half precision on GPU, or on all CPU threads otherwise.
+
+    Non-PyTorch encoders (such as OnnxEncoder) are returned unchanged.
+    """
+    if torch is None or not isinstance(model, torch.nn.Module):
+        return model
+    if torch.cuda.is_available():
+        dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        return model.to(device='cuda', dtype=dtype)
+    torch.set_num_threads(os.cpu_count() or 1)
+    return model
+
+
+def encode_sorted(model: Any, texts: List[str], batch_size: int = EMBED_BATCH_SIZE,
+                  normalize_embeddings: bool = False) -> np.ndarray:
+    """Encode texts in length-sorted batches to reduce padding, returning rows in input order."""
+    if not texts:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    order = np.argsort([len(t) for t in texts], kind='stable')
+    with torch.inference_mode() if torch is not None else contextlib.nullcontext():
+        emb = model.encode([texts[i] for i in order], batch_size=batch_size, convert_to_numpy=True,
+                           normalize_embeddings=normalize_embeddings, show_progress_bar=False)
+    # Undo the length sort so rows line up with the input texts
+    return np.asarray(emb)[np.argsort(order)]
+
+
+def encode_cached(model: Any, texts: List[str], cache_dir: str, model_name: str,
+                  normalize_embeddings: bool = False) -> np.ndarray:
+    """Encode texts, reusing float16 vectors cached on disk by content hash.
+
+    Entries are namespaced by model, backend and normalisation, so callers
+    that post-process differently never read each other's vectors.
+    """
+    backend = 'onnx' if isinstance(model, OnnxEncoder) else 'torch'
+    post = 'norm' if normalize_embeddings else 'raw'
+    version_dir = os.path.join(
+        cache_dir, f"{EMBED_CACHE_VERSION}_{model_name.replace('/', '_')}_{backend}_{post}")
+    os.makedirs(version_dir, exist_ok=True)
+    paths = [
+        os.path.join(version_dir, hashlib.blake2b(t.encode('utf-8'), digest_size=16).hexdigest() + '.npy')
+        for t in texts
+    ]
+    vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+    miss_idx: List[int] = []
+    for i, path in enumerate(paths):
+        if os.path.exists(path):
+            vectors[i] = np.load(path).astype(np.float32)
+        else:
+            miss_idx.append(i)
+    if miss_idx:
+        fresh = encode_sorted(model, [texts[i] for i in miss_idx], normalize_embeddings=normalize_embeddings)
+        for i, vec in zip(miss_idx, fresh):
+            half = vec.astype(np.float16)
+            # Write to a unique temp file and rename, so a concurrent run
+            # never loads a partially written entry
+            fd, tmp_path = tempfile.mkstemp(dir=version_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, half)
+            os.replace(tmp_path, paths[i])
+            # Round-trip through float16 so hits and misses are identical
+            vectors[i] = half.astype(np.float32)
+    if not vectors:
+        return np.zeros((0, model.get_sentence_embedding_dimension()), dtype=np.float32)
+    return np.vstack(vectors)
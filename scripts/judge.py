@@ -20,7 +20,12 @@ each clause.
 """
 import argparse
 import json
-from typing import Any, Dict
+from typing import Any, Dict, List, Set, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None  # type: ignore
 
 
 def load_json(path: str) -> Any:
@@ -28,25 +33,54 @@ def load_json(path: str) -> Any:
         return json.load(f)
 
 
+def find_contained(results: Dict[str, Any]) -> Set[str]:
+    """Return the clause IDs whose non-empty expected text occurs in their actual text.
+
+    Clauses sharing the same actual text are checked together with a single
+    Aho-Corasick pass when pyahocorasick is installed.
+    """
+    by_actual: Dict[str, List[Tuple[str, str]]] = {}
+    for clause_id, data in results.items():
+        expected = data.get('expected', '')
+        if expected:
+            actual = data.get('actual', '') or ''
+            by_actual.setdefault(actual, []).append((clause_id, expected))
+
+    contained: Set[str] = set()
+    for actual, pairs in by_actual.items():
+        if ahocorasick is None or len(pairs) == 1:
+            contained.update(cid for cid, expected in pairs if expected in actual)
+            continue
+        automaton = ahocorasick.Automaton()
+        for cid, expected in pairs:
+            if automaton.exists(expected):
+                automaton.get(expected).append(cid)
+            else:
+                automaton.add_word(expected, [cid])
+        automaton.make_automaton()
+        for _, cids in automaton.iter(actual):
+            contained.update(cids)
+    return contained
+
+
 def judge_clauses(results: Dict[str, Any]) -> Dict[str, Any]:
     """Apply judge logic to each clause in the results dict."""
     judged: Dict[str, Any] = {}
+    contained = find_contained(results)
     for clause_id, data in results.items():
         # Copy original data
         clause_result = dict(data)
         status = clause_result.get('status')
-        expected = clause_result.get('expected', '')
-        actual = clause_result.get('actual', '') or ''
         judge_status = status
         judge_reason = ''
         if status == 'PASS':
             # Overturn PASS to UNCERTAIN if expected string not in actual
-            if expected and expected not in actual:
+            if clause_result.get('expected') and clause_id not in contained:
                 judge_status = 'UNCERTAIN'
                 judge_reason = 'Expected text not found in actual text'
         elif status == 'FAIL':
             # Flag conflict if expected appears in actual
-            if expected and expected in actual:
+            if clause_id in contained:
                 judge_status = 'CONFLICT'
                 judge_reason = 'Expected text found despite FAIL verdict'
         # Attach judge verdict
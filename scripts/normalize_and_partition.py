@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 """
 normalize_and_partition.py
-This script normalises Persian text (digit conversion, character unification, ZWNJ removal)
+This script normalises Persian text (NFKC, digit conversion, character unification,
+tatweel/diacritic/ZWNJ removal)
 and partitions input Office or PDF documents into structured elements using the
 unstructured library. It outputs a JSON list of elements with associated
 metadata such as page number and element identifier.
@@ -15,11 +16,19 @@ elements across all documents.
 """
 import argparse
 import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import os
 import sys
 import uuid
 from typing import List, Dict
 
+from text_normalization import normalize_text
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
 try:
     # Import unstructured partitioner lazily. This will be installed via
     # requirements.txt.
@@ -28,57 +37,42 @@ except ImportError:
     print("unstructured is required for this script. Please install via requirements.txt.", file=sys.stderr)
     raise
 
-# Translation tables for digit normalisation and character unification.
-PERSIAN_DIGITS = "۰۱۲۳۴۵۶۷۸۹"
-ENGLISH_DIGITS = "0123456789"
-YEH_VARIANTS = "يی"
-KAF_VARIANTS = "كک"
-
-def normalize_text(text: str) -> str:
-    """Normalise Persian text by converting digits, unifying yeh/kaf and removing ZWNJ."""
-    if not text:
-        return ""
-    # Convert Persian digits to English digits
-    translation_table = str.maketrans({p: e for p, e in zip(PERSIAN_DIGITS, ENGLISH_DIGITS)})
-    text = text.translate(translation_table)
-    # Unify yeh variants to ی and kaf variants to ک
-    for variant in YEH_VARIANTS:
-        text = text.replace(variant, "ی")  # Farsi Yeh
-    for variant in KAF_VARIANTS:
-        text = text.replace(variant, "ک")  # Kaf
-    # Remove zero‑width non‑joiner (U+200C)
-    text = text.replace("\u200c", "")
-    return text
 
 def process_file(path: str) -> List[Dict[str, object]]:
     """Partition a single file into elements and normalise their text."""
     elements = partition(filename=path)
+    # Some elements may lack text (e.g., images). Skip them.
+    elements = [el for el in elements if getattr(el, 'text', None)]
+    doc = os.path.basename(path)
     items: List[Dict[str, object]] = []
-    for el in elements:
-        # Some elements may lack text (e.g., images). Skip them.
-        txt = getattr(el, 'text', None)
-        if not txt:
-            continue
-        normalized = normalize_text(txt)
+    append = items.append
+    for position, el in enumerate(elements):
         # Get page number from metadata if available; default to 0
-        page_no = 0
         try:
-            page_no = int(getattr(el.metadata, 'page_number', 0) or 0)
+            page_no = int(el.metadata.page_number or 0)
         except Exception:
             page_no = 0
-        items.append({
-            "doc": os.path.basename(path),
+        append({
+            "doc": doc,
             "page": page_no,
-            "element_id": str(uuid.uuid4()),
+            # Derived from the document and position, so re-running on the
+            # same input yields the same IDs (and the same chunk IDs downstream)
+            "element_id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"{doc}#{position}")),
             "type": getattr(el, 'category', 'text'),
-            "text": normalized
+            "text": normalize_text(el.text)
         })
     return items
 
+def _dump_item(item: Dict[str, object]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(item)
+    return json.dumps(item, ensure_ascii=False).encode('utf-8')
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Normalise and partition documents.")
     parser.add_argument("--input", required=True, help="Input directory containing files to process")
     parser.add_argument("--output", required=True, help="Output JSON file to write elements to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of files to partition in parallel")
     args = parser.parse_args()
 
     input_dir = args.input
@@ -88,19 +82,34 @@ def main() -> None:
         print(f"Input directory {input_dir} does not exist", file=sys.stderr)
         sys.exit(1)
 
-    all_elements: List[Dict[str, object]] = []
-    for fname in os.listdir(input_dir):
-        full_path = os.path.join(input_dir, fname)
-        if not os.path.isfile(full_path):
-            continue
-        try:
-            file_elements = process_file(full_path)
-            all_elements.extend(file_elements)
-        except Exception as exc:
-            print(f"Error processing {fname}: {exc}", file=sys.stderr)
+    # scandir entries carry the file type from the directory read, so no
+    # extra stat() per entry
+    with os.scandir(input_dir) as it:
+        full_paths = [entry.path for entry in it if entry.is_file()]
 
-    with open(output_path, 'w', encoding='utf-8') as f_out:
-        json.dump(all_elements, f_out, ensure_ascii=False, indent=2)
+    # Partitioning is CPU-bound and files are independent, so each file is
+    # handled by its own worker process. Each file's elements are appended to
+    # the output array as soon as it finishes, so only one file's results are
+    # held at a time; a failing file does not abort the others.
+    with ProcessPoolExecutor(max_workers=args.workers) as ex, \
+            open(output_path, 'wb', buffering=1 << 20) as f_out:
+        futures = {ex.submit(process_file, path): path for path in full_paths}
+        f_out.write(b'[')
+        first = True
+        for future in as_completed(futures):
+            try:
+                items = future.result()
+            except Exception as exc:
+                print(f"Error processing {os.path.basename(futures[future])}: {exc}", file=sys.stderr)
+                continue
+            finally:
+                del futures[future]
+            for item in items:
+                if not first:
+                    f_out.write(b',\n')
+                f_out.write(_dump_item(item))
+                first = False
+        f_out.write(b']\n')
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -35,54 +35,91 @@ except ImportError:
     RGBColor = None  # type: ignore
     Pt = None  # type: ignore
 
+try:
+    import fast_diff_match_patch
+except ImportError:
+    fast_diff_match_patch = None  # type: ignore
+
 try:
     import diff_match_patch
 except ImportError:
     diff_match_patch = None  # type: ignore
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+# Diff operation codes, as used by diff-match-patch
+DIFF_DELETE = -1
+DIFF_EQUAL = 0
+DIFF_INSERT = 1
+# Maps fast-diff-match-patch's op symbols onto the codes above
+_FAST_DIFF_OPS = {'-': DIFF_DELETE, '=': DIFF_EQUAL, '+': DIFF_INSERT}
+
+# Seconds a single diff may take before settling for a coarser result
+DIFF_TIMEOUT = 0.5
+
+# Shared pure-Python diff engine, used when the native one is unavailable
+_DMP = diff_match_patch.diff_match_patch() if diff_match_patch else None
+if _DMP is not None:
+    _DMP.Diff_Timeout = DIFF_TIMEOUT
+
+# Output buffer size for the issue register files
+WRITE_BUFFER_SIZE = 1 << 20
+
 
 def load_json(path: str) -> Any:
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
+ISSUE_FIELDS = ('expected', 'actual', 'status', 'judge_status', 'fix', 'severity')
+
+
 def build_issue_register(results: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Flatten the clause results into a list of issue dicts."""
-    issues = []
-    for clause_id, data in results.items():
-        issues.append({
-            'clause': clause_id,
-            'expected': data.get('expected', ''),
-            'actual': data.get('actual', ''),
-            'status': data.get('status', ''),
-            'judge_status': data.get('judge_status', ''),
-            'fix': data.get('fix', ''),
-            'severity': data.get('severity', '')
-        })
-    return issues
+    return [
+        {'clause': clause_id, **{key: data.get(key, '') for key in ISSUE_FIELDS}}
+        for clause_id, data in results.items()
+    ]
 
 
 def write_csv(issues: List[Dict[str, Any]], path: str) -> None:
     fieldnames = ['clause', 'status', 'judge_status', 'severity', 'expected', 'actual', 'fix']
-    with open(path, 'w', encoding='utf-8', newline='') as csvfile:
+    with open(path, 'w', encoding='utf-8', newline='', buffering=WRITE_BUFFER_SIZE) as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         writer.writeheader()
-        for issue in issues:
-            writer.writerow(issue)
+        writer.writerows(issues)
 
 
 def write_json(issues: List[Dict[str, Any]], path: str) -> None:
-    with open(path, 'w', encoding='utf-8') as f_out:
+    if orjson is not None:
+        # Serialised in native code and written with a single call
+        with open(path, 'wb') as f_out:
+            f_out.write(orjson.dumps(issues, option=orjson.OPT_INDENT_2))
+        return
+    with open(path, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f_out:
         json.dump(issues, f_out, ensure_ascii=False, indent=2)
 
 
 def diff_text(expected: str, actual: str) -> List[tuple]:
-    """Compute a list of diffs between expected and actual using diff-match-patch."""
-    if diff_match_patch is None:
+    """Compute a list of (op, text) diffs between expected and actual.
+
+    Uses the native fast-diff-match-patch when installed and falls back to
+    the pure-Python diff-match-patch; both apply semantic cleanup.
+    """
+    if fast_diff_match_patch is not None:
+        diffs = fast_diff_match_patch.diff(expected, actual, counts_only=False,
+                                           cleanup='Semantic', timelimit=DIFF_TIMEOUT)
+        return [(_FAST_DIFF_OPS[op], text) for op, text in diffs]
+    if _DMP is None:
         return []
-    dmp = diff_match_patch.diff_match_patch()
-    diffs = dmp.diff_main(expected, actual)
-    dmp.diff_cleanupSemantic(diffs)
+    diffs = _DMP.diff_main(expected, actual)
+    _DMP.diff_cleanupSemantic(diffs)
     return diffs
 
 
@@ -92,11 +129,11 @@ def add_diff_to_doc(paragraph, diffs) -> None:
         return
     for op, text in diffs:
         run = paragraph.add_run(text)
-        if op == diff_match_patch.diff_delete:
+        if op == DIFF_DELETE:
             # deletion – red strike
             run.font.color.rgb = RGBColor(0xFF, 0x00, 0x00)
             run.font.strike = True
-        elif op == diff_match_patch.diff_insert:
+        elif op == DIFF_INSERT:
             # insertion – green bold
             run.font.color.rgb = RGBColor(0x00, 0x80, 0x00)
             run.font.bold = True
@@ -125,16 +162,19 @@ def build_report(results: Dict[str, Any], deterministic: Dict[str, Any], output_
 
     # Clause verdict matrix
     doc.add_heading('Clause Verdict Matrix', level=2)
-    table = doc.add_table(rows=1, cols=6)
-    hdr_cells = table.rows[0].cells
+    # Allocate all rows up front and materialise them once: every table.rows
+    # access rebuilds the full row list, so indexing it per issue is quadratic
+    table = doc.add_table(rows=1 + len(issues), cols=6)
+    rows = list(table.rows)
+    hdr_cells = rows[0].cells
     hdr_cells[0].text = 'Clause'
     hdr_cells[1].text = 'Expected'
     hdr_cells[2].text = 'Actual'
     hdr_cells[3].text = 'Status'
     hdr_cells[4].text = 'Judge'
     hdr_cells[5].text = 'Fix'
-    for issue in issues:
-        row_cells = table.add_row().cells
+    for row, issue in zip(rows[1:], issues):
+        row_cells = row.cells
         row_cells[0].text = issue['clause']
         row_cells[1].text = issue['expected']
         row_cells[2].text = issue['actual']
@@ -26,53 +26,188 @@ chunks, where each candidate entry includes the child ID and the chunk
 text. Only the top N matches (default 50) are kept per clause.
 """
 import argparse
+import heapq
+import itertools
 import json
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from text_normalization import normalize_text
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+try:
+    import ijson
+except ImportError:
+    ijson = None  # type: ignore
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None  # type: ignore
+
+# Characters that give a locator regex meaning beyond its literal text
+REGEX_METACHARACTERS = set('.^$*+?{}[]\\|()')
+
+# Locator constructs that change meaning inside a combined alternation:
+# inline global flags such as (?i), and backreferences (numbered or named)
+RE_UNCOMBINABLE = re.compile(r"\(\?[aiLmsux]+\)|\\[1-9]|\(\?P=")
+
+# A clause's compiled locators, plus an alternation of all of them used to
+# skip chunks none of them match (None when it cannot be built safely)
+ClausePatterns = Tuple[Optional[re.Pattern], List[re.Pattern]]
 
 
 def load_json(path: str) -> Any:
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
     with open(path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
+def stream_chunks(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield child chunks one at a time from a JSON array file.
+
+    Uses ijson so the whole file is never materialised; without ijson the
+    file is loaded with `load_json` and iterated.
+    """
+    if ijson is None:
+        yield from load_json(path)
+        return
+    with open(path, 'rb') as f:
+        yield from ijson.items(f, 'item')
+
+
 def save_json(data: Any, path: str) -> None:
+    if orjson is not None:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
     with open(path, 'w', encoding='utf-8') as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
-def compile_clause_patterns(requirements: Dict[str, Any]) -> Dict[str, List[re.Pattern]]:
-    """Compile regex patterns for each clause based on its regex_locators field."""
-    patterns: Dict[str, List[re.Pattern]] = {}
+def _combine_locators(regexes: List[str]) -> Optional[re.Pattern]:
+    """Join locators into one alternation that matches wherever any of them does.
+
+    Returns None for a single locator (nothing to gain) and whenever joining
+    could change a locator's meaning, in which case callers fall back to the
+    individually compiled locators.
+    """
+    if len(regexes) < 2 or any(RE_UNCOMBINABLE.search(regex) for regex in regexes):
+        return None
+    try:
+        return re.compile("|".join(f"(?:{regex})" for regex in regexes), re.IGNORECASE)
+    except re.error:
+        # e.g. the same group name used in two locators
+        return None
+
+
+def compile_clause_patterns(requirements: Dict[str, Any]) -> Dict[str, ClausePatterns]:
+    """Compile regex patterns for each clause based on its regex_locators field.
+
+    Each clause maps to its individually compiled locators and, where safe,
+    an alternation of them (see _combine_locators). Locators go through the
+    same normalize_text as the chunk text, so e.g. Persian digits or hamza
+    forms in the schema still match.
+    """
+    patterns: Dict[str, ClausePatterns] = {}
     for clause in requirements.get('clauses', []):
         clause_id = clause['id']
-        regexes = clause.get('regex_locators', [])
+        regexes = [normalize_text(regex) for regex in clause.get('regex_locators', [])]
         compiled = [re.compile(regex, re.IGNORECASE) for regex in regexes]
-        patterns[clause_id] = compiled
+        patterns[clause_id] = (_combine_locators(regexes), compiled)
     return patterns
 
 
-def offline_candidate_selection(child_chunks: List[Dict[str, Any]], patterns: Dict[str, List[re.Pattern]], top_k: int = 50) -> Dict[str, List[Dict[str, Any]]]:
-    """Select candidate child chunks per clause using simple pattern matching."""
-    results: Dict[str, List[Dict[str, Any]]] = {}
-    for clause_id, regex_list in patterns.items():
-        candidates: List[Dict[str, Any]] = []
-        for chunk in child_chunks:
-            text = chunk.get('text', '')
-            match_count = 0
-            for regex in regex_list:
-                if regex.search(text):
-                    match_count += 1
-            if match_count > 0:
-                candidates.append({
-                    'child_id': chunk['child_id'],
-                    'text': text,
-                    'match_count': match_count
-                })
-        # Sort by match count descending and truncate
-        candidates.sort(key=lambda x: x['match_count'], reverse=True)
-        results[clause_id] = candidates[:top_k]
-    return results
+def build_anchor_prefilter(requirements: Dict[str, Any]) -> Optional[Tuple[Any, Set[str]]]:
+    """Build an Aho-Corasick automaton over literal anchors of the clause locators.
+
+    A clause's anchors are its `literal_anchors` field if present, otherwise
+    its regex_locators when all of them are plain literals. Every locator match
+    must contain one of the clause's anchors, so chunks without any anchor can
+    skip that clause's regex. Returns the automaton (anchors normalised and lowercased,
+    mapping to clause IDs) and the set of clauses that cannot be prefiltered,
+    or None when pyahocorasick is unavailable or there are no anchors.
+    """
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    unfiltered: Set[str] = set()
+    for clause in requirements.get('clauses', []):
+        clause_id = clause['id']
+        anchors = clause.get('literal_anchors')
+        if anchors is None:
+            anchors = clause.get('regex_locators', [])
+            if any(REGEX_METACHARACTERS.intersection(regex) for regex in anchors):
+                unfiltered.add(clause_id)
+                continue
+        for anchor in anchors:
+            key = normalize_text(anchor).lower()
+            if automaton.exists(key):
+                automaton.get(key).add(clause_id)
+            else:
+                automaton.add_word(key, {clause_id})
+    if len(automaton) == 0:
+        return None
+    automaton.make_automaton()
+    return automaton, unfiltered
+
+
+def offline_candidate_selection(child_chunks: Iterable[Dict[str, Any]], patterns: Dict[str, ClausePatterns], top_k: int = 50,
+                                prefilter: Optional[Tuple[Any, Set[str]]] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Select candidate child chunks per clause using simple pattern matching.
+
+    A chunk's score is the number of the clause's locators that match it.
+    The clause's combined pattern, when available, rejects chunks that no
+    locator matches in a single scan; only the remaining chunks are searched
+    with each locator. Only the best `top_k` candidates per clause are held in memory,
+    so `child_chunks` may be a stream. With a `prefilter` from
+    `build_anchor_prefilter`, a clause's pattern only runs on chunks that
+    contain one of its anchors.
+    """
+    # Per-clause min-heaps of (match_count, -seq, candidate); -seq breaks
+    # ties in favour of earlier chunks, matching a stable descending sort.
+    heaps: Dict[str, List[Tuple[int, int, Dict[str, Any]]]] = {clause_id: [] for clause_id in patterns}
+    active = [(clause_id, combined, regex_list) for clause_id, (combined, regex_list) in patterns.items() if regex_list]
+    if top_k <= 0:
+        active = []
+    # Visit each chunk once and test it against every clause while its
+    # text is hot, rather than re-walking all chunks for each clause.
+    for seq, chunk in zip(itertools.count(), child_chunks):
+        text = chunk.get('text', '')
+        clauses = active
+        if prefilter is not None:
+            automaton, unfiltered = prefilter
+            hit_clauses = set(unfiltered)
+            for _, clause_ids in automaton.iter(text.lower()):
+                hit_clauses.update(clause_ids)
+            clauses = [entry for entry in active if entry[0] in hit_clauses]
+        for clause_id, combined, regex_list in clauses:
+            if combined is not None and combined.search(text) is None:
+                continue
+            match_count = sum(1 for regex in regex_list if regex.search(text))
+            if match_count == 0:
+                continue
+            heap = heaps[clause_id]
+            entry = (match_count, -seq, {
+                'child_id': chunk['child_id'],
+                'text': text,
+                'match_count': match_count
+            })
+            if len(heap) < top_k:
+                heapq.heappush(heap, entry)
+            elif entry[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, entry)
+    # Order by match count descending, then chunk order
+    return {
+        clause_id: [candidate for _, _, candidate in sorted(heap, key=lambda e: e[:2], reverse=True)]
+        for clause_id, heap in heaps.items()
+    }
 
 
 def main() -> None:
@@ -83,10 +218,11 @@ def main() -> None:
     parser.add_argument("--top-k", type=int, default=50, help="Number of top candidates to keep per clause")
     args = parser.parse_args()
 
-    child_chunks = load_json(args.child_chunks)
+    child_chunks = stream_chunks(args.child_chunks)
     requirements = load_json(args.requirements)
     clause_patterns = compile_clause_patterns(requirements)
-    candidates = offline_candidate_selection(child_chunks, clause_patterns, top_k=args.top_k)
+    prefilter = build_anchor_prefilter(requirements)
+    candidates = offline_candidate_selection(child_chunks, clause_patterns, top_k=args.top_k, prefilter=prefilter)
     save_json(candidates, args.output)
 
 if __name__ == "__main__":
@@ -0,0 +1,38 @@
+"""
+text_normalization.py
+
+Persian text normalisation shared by normalize_and_partition.py, which
+applies it to every partitioned element, and retrieve_candidates.py, which
+applies it to the clause locators so they match the normalised chunk text.
+"""
+import unicodedata
+
+# Translation tables for digit normalisation and character unification.
+PERSIAN_DIGITS = "۰۱۲۳۴۵۶۷۸۹"
+ARABIC_DIGITS = "٠١٢٣٤٥٦٧٨٩"
+ENGLISH_DIGITS = "0123456789"
+YEH_VARIANTS = "يیى"
+KAF_VARIANTS = "كک"
+ALEF_VARIANTS = "أإآٱ"
+HEH_VARIANTS = "ۀ"
+# Tatweel (kashida), Arabic harakat U+064B–U+0652 and zero‑width non‑joiner
+STRIPPED_CHARS = "\u0640" + "".join(chr(c) for c in range(0x064B, 0x0653)) + "\u200c"
+
+# Single table applying every rewrite in one pass: Persian/Arabic digits to
+# ASCII, yeh/kaf/alef/heh variants to their plain Farsi letter, and the
+# characters above removed. Presentation forms are folded by NFKC first.
+_NORMALIZE_TABLE = str.maketrans({
+    **{p: e for p, e in zip(PERSIAN_DIGITS, ENGLISH_DIGITS)},
+    **{a: e for a, e in zip(ARABIC_DIGITS, ENGLISH_DIGITS)},
+    **{variant: "ی" for variant in YEH_VARIANTS},
+    **{variant: "ک" for variant in KAF_VARIANTS},
+    **{variant: "ا" for variant in ALEF_VARIANTS},
+    **{variant: "ه" for variant in HEH_VARIANTS},
+    **{c: None for c in STRIPPED_CHARS},
+})
+
+def normalize_text(text: str) -> str:
+    """Normalise Persian text: NFKC, ASCII digits, unified letters, no tatweel/diacritics/ZWNJ."""
+    if not text:
+        return ""
+    return unicodedata.normalize("NFKC", text).translate(_NORMALIZE_TABLE)
@@ -0,0 +1,257 @@
+"""
+FastAPI worker for PO review pipeline (Vercel-ready).
+
+Shared core for every deployment target: create_app() builds the app and
+the entry points (worker/main.py, api/index.py) are thin adapters over it.
+
+- Writes to /tmp (Vercel's writable dir).
+- Enforces X-Worker-Token on all routes.
+- On POST /po-check, saves inputs and triggers GitHub repository_dispatch
+  with event_type=po_review_request and client_payload={"jobId": <job id>}.
+
+Env vars required (set in Vercel Project Settings → Environment Variables):
+  WORKER_TOKEN          # the shared secret for clients
+  DATA_ROOT             # optional; defaults to /tmp/data
+  GH_OWNER              # e.g., 'Jaspersunnyson'
+  GH_REPO               # e.g., 'dana-po-cloud-free'
+  GH_DISPATCH_TOKEN     # fine-grained PAT with Contents:RW and Actions:RW (repo)
+"""
+import hmac
+import os
+import secrets
+import json
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Depends, BackgroundTasks, Request
+from fastapi.responses import FileResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+# Shared GitHub API session, created on first dispatch so `requests` stays
+# off the cold-start import path while later dispatches reuse keep-alive
+# connections
+_GH_SESSION = None
+
+def _gh_session():
+    global _GH_SESSION
+    if _GH_SESSION is None:
+        import requests
+        session = requests.Session()
+        session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        })
+        _GH_SESSION = session
+    return _GH_SESSION
+
+def _json_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+def _json_loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+# Parsed status files kept per app (least recently used are evicted first)
+STATUS_CACHE_SIZE = 1024
+
+def _temp_path(path: Path, suffix: str = ".tmp") -> Path:
+    """Create a uniquely named empty file next to `path`, for write-then-rename."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=suffix)
+    os.close(fd)
+    return Path(tmp_name)
+
+def _save_binary(path: Path, data: bytes) -> None:
+    # Write to a unique sibling temp file and rename, so readers never see a
+    # partial file and concurrent writers never share a temp file
+    tmp_path = _temp_path(path)
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+async def _stream_upload(upload: UploadFile, path: Path, chunk_size: int = 1 << 20) -> None:
+    """Copy an upload to disk in chunks so it is never held whole in memory."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb", buffering=chunk_size) as f:
+        while chunk := await upload.read(chunk_size):
+            f.write(chunk)
+
+async def _stream_body(request: Request, path: Path, buffer_size: int = 1 << 20) -> int:
+    """Write a request body to disk as it arrives; returns the bytes written."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    written = 0
+    with open(path, "wb", buffering=buffer_size) as f:
+        async for chunk in request.stream():
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+def _read_binary(path: Path) -> Optional[bytes]:
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+def _dispatch_to_github(job_id: str) -> dict:
+    owner = os.getenv("GH_OWNER")
+    repo  = os.getenv("GH_REPO")
+    token = os.getenv("GH_DISPATCH_TOKEN")
+    if not all([owner, repo, token]):
+        return {"dispatched": False, "reason": "GH_* env missing"}
+
+    url = f"https://api.github.com/repos/{owner}/{repo}/dispatches"
+    headers = {"Authorization": f"Bearer {token}"}
+    payload = {
+        "event_type": "po_review_request",
+        "client_payload": {"jobId": job_id}
+    }
+    try:
+        r = _gh_session().post(url, headers=headers, json=payload, timeout=15)
+        ok = (200 <= r.status_code < 300)
+        return {"dispatched": ok, "status": r.status_code, "text": r.text[:200]}
+    except Exception as e:
+        return {"dispatched": False, "error": str(e)}
+
+def create_app(data_root: Path) -> FastAPI:
+    """Build the worker app, storing inputs, status and artifacts under data_root."""
+    app = FastAPI()
+
+    worker_token = os.getenv("WORKER_TOKEN", "")
+    worker_token_bytes = worker_token.encode("utf-8") if worker_token else None
+
+    # Parsed status files keyed by job id, with the (inode, mtime, size) they were read at
+    status_cache: "OrderedDict[str, Tuple[Tuple[int, int, int], Any]]" = OrderedDict()
+    # get_status is a sync route and runs on several threadpool threads
+    status_cache_lock = threading.Lock()
+
+    def verify_token(x_worker_token: Optional[str] = Header(None, alias="X-Worker-Token")):
+        if not worker_token_bytes:
+            raise HTTPException(status_code=500, detail="WORKER_TOKEN not configured")
+        # Constant-time comparison so response timing does not leak the token
+        if not hmac.compare_digest(worker_token_bytes, (x_worker_token or "").encode("utf-8")):
+            raise HTTPException(status_code=401, detail="Unauthorized")
+        return True
+
+    def dispatch_and_record(job_id: str) -> None:
+        """Dispatch the job to GitHub and store the outcome in its status file."""
+        dispatch = _dispatch_to_github(job_id)
+        status_path = data_root / "status" / f"{job_id}.json"
+        data = _read_binary(status_path)
+        status = _json_loads(data) if data is not None else {}
+        # Leave the status alone if the pipeline has already reported progress
+        if status.get("status", "received") != "received":
+            return
+        status.update({"status": "received", "dispatch": dispatch})
+        _save_binary(status_path, _json_bytes(status))
+
+    @app.get("/health")
+    def health():
+        return {"ok": True}
+
+    @app.post("/po-check")
+    async def po_check(
+        background_tasks: BackgroundTasks,
+        po: UploadFile = File(...),
+        pi: UploadFile = File(...),
+        commission: UploadFile = File(...),
+        template_override: str = "irr_main",
+        noban_option: str = "a",
+        pg_waived: str = "false",
+        apg_required: str = "true",
+        _=Depends(verify_token),
+    ):
+        # 96 random bits, URL- and path-safe (16 chars)
+        job_id = secrets.token_urlsafe(12)
+
+        await _stream_upload(po,         data_root / "in" / job_id / "po")
+        await _stream_upload(pi,         data_root / "in" / job_id / "pi")
+        await _stream_upload(commission, data_root / "in" / job_id / "commission")
+
+        toggles = {
+            "template_override": template_override,
+            "noban_option": noban_option,
+            "pg_waived": pg_waived,
+            "apg_required": apg_required,
+        }
+        _save_binary(data_root / "in" / job_id / "toggles.json",
+                     _json_bytes(toggles))
+
+        _save_binary(data_root / "status" / f"{job_id}.json",
+                     _json_bytes({"status": "received"}))
+
+        # Dispatch after the response is sent; the outcome lands in the status file
+        background_tasks.add_task(dispatch_and_record, job_id)
+        return {"jobId": job_id, "status": "received", "dispatch": {"scheduled": True}, "status_url": f"/status/{job_id}"}
+
+    @app.get("/status/{job_id}")
+    def get_status(job_id: str, _=Depends(verify_token)):
+        path = data_root / "status" / f"{job_id}.json"
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return {"status": "unknown"}
+        # Polls of an unchanged status cost a single stat(). Writers replace
+        # the file, which always gives it a new inode, so a same-size rewrite
+        # within one mtime tick is still detected.
+        version = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with status_cache_lock:
+            cached = status_cache.get(job_id)
+            if cached and cached[0] == version:
+                status_cache.move_to_end(job_id)
+                return cached[1]
+        data = _read_binary(path)
+        if data is None:
+            return {"status": "unknown"}
+        status = _json_loads(data)
+        with status_cache_lock:
+            status_cache[job_id] = (version, status)
+            status_cache.move_to_end(job_id)
+            if len(status_cache) > STATUS_CACHE_SIZE:
+                status_cache.popitem(last=False)
+        return status
+
+    @app.put("/status/{job_id}")
+    async def put_status(job_id: str, request: Request, _=Depends(verify_token)):
+        body = await request.body()
+        if not body:
+            raise HTTPException(status_code=400, detail="No body provided")
+        _save_binary(data_root / "status" / f"{job_id}.json", body)
+        return {"status": "ok"}
+
+    @app.get("/artifact/{job_id}/{filename}")
+    def get_artifact(job_id: str, filename: str, _=Depends(verify_token)):
+        # Served straight from disk (sendfile where available), not via memory
+        for path in (data_root / "out" / job_id / filename, data_root / "in" / job_id / filename):
+            if path.is_file():
+                return FileResponse(path, filename=filename)
+        raise HTTPException(status_code=404, detail="File not found")
+
+    @app.put("/artifact/{job_id}/{filename}")
+    async def put_artifact(job_id: str, filename: str, request: Request, _=Depends(verify_token)):
+        path = data_root / "out" / job_id / filename
+        tmp_path = _temp_path(path, suffix=".part")
+        try:
+            written = await _stream_body(request, tmp_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        if not written:
+            tmp_path.unlink()
+            raise HTTPException(status_code=400, detail="No body provided")
+        # Publish only complete uploads
+        os.replace(tmp_path, path)
+        return {"status": "ok"}
+
+    return app